@@ -7,6 +7,12 @@ import random
 import time
 import sqlite3
 import io
+import threading
+import logging
+from orders_db import (
+    SNAPSHOT_DB_FILE, SNAPSHOT_INTERVAL, init_orders_db, save_order,
+    refresh_snapshot, snapshot_refresh_loop, query_snapshot, snapshot_age
+)
 
 st.set_page_config(page_title="Digital Order System", layout="centered")
 st.title("📊 Digital Order System")
@@ -14,6 +20,8 @@ st.title("📊 Digital Order System")
 # ================= DATABASE SETUP =================
 DATABASE_FILE = ":memory:"
 
+logger = logging.getLogger(__name__)
+
 def init_database_from_excel(uploaded_file=None):
     """Initialize database from uploaded Excel file"""
     conn = sqlite3.connect(DATABASE_FILE)
@@ -210,6 +218,8 @@ if "form_version" not in st.session_state:
     st.session_state.form_version = str(time.time())
 if "rate_type" not in st.session_state:
     st.session_state.rate_type = "Shivnanda"
+if "search_results" not in st.session_state:
+    st.session_state.search_results = None
 
 # ================= FILE UPLOAD =================
 st.header("📁 Step 1: Upload Excel File (Optional)")
@@ -275,6 +285,40 @@ def get_rate(category, rate_type):
         return float(result[0]) if result else 0.0
     return 0.0
 
+# ================= ORDER STORAGE =================
+@st.cache_resource
+def start_snapshot_refresher():
+    """Start one background thread per server that keeps the snapshot fresh"""
+    init_orders_db()
+    # Set ORDERS_SNAPSHOT_REFRESH=0 when another process already refreshes it
+    if os.environ.get("ORDERS_SNAPSHOT_REFRESH", "1") == "0":
+        return None
+    try:
+        refresh_snapshot()
+    except Exception:
+        logger.exception("Initial snapshot refresh failed")
+
+    thread = threading.Thread(target=snapshot_refresh_loop, name="orders-snapshot", daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_data(max_entries=4)
+def load_vendor_report(snapshot_mtime):
+    """Totals by vendor, computed once per snapshot (snapshot_mtime is the cache key)"""
+    return query_snapshot(
+        """SELECT vendor AS Vendor, COUNT(*) AS Orders, ROUND(SUM(total), 2) AS Total
+           FROM orders GROUP BY vendor ORDER BY Total DESC"""
+    )
+
+# Saving and search need orders.db; the order form and PDFs work without it
+try:
+    start_snapshot_refresher()
+    orders_db_ready = True
+except Exception as e:
+    logger.exception("Orders database unavailable")
+    orders_db_ready = False
+    st.error(f"Saved orders unavailable: {str(e)[:100]}. Saving and search are disabled.")
+
 # ================= PDF GENERATION (FIXED ENCODING) =================
 class UnicodePDF(FPDF):
     """PDF class that supports Unicode characters"""
@@ -523,7 +567,8 @@ if st.session_state.data_loaded:
     col_save, col_pdf = st.columns(2)
     
     with col_save:
-        if st.button("💾 Save Order", type="primary", use_container_width=True):
+        if st.button("💾 Save Order", type="primary", use_container_width=True,
+                     disabled=not orders_db_ready):
             valid_order = any(line["amount"] > 0 for line in st.session_state.order_lines)
             
             if not valid_order:
@@ -532,9 +577,23 @@ if st.session_state.data_loaded:
                 if not st.session_state.current_order_id:
                     st.session_state.current_order_id = f"ORD{datetime.now().strftime('%Y%m%d%H%M%S')}{random.randint(100,999)}"
                 
-                total = sum(line["amount"] for line in st.session_state.order_lines)
-                st.success(f"Order {st.session_state.current_order_id} saved!")
-                st.info(f"Total Amount: Rs.{total:.2f}")
+                order_data = {
+                    "order_id": st.session_state.current_order_id,
+                    "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M"),
+                    "vendor": vendor,
+                    "campus": campus,
+                    "event": event,
+                    "rate_type": rate_type,
+                    "order_by": order_by
+                }
+                
+                try:
+                    save_order(order_data, st.session_state.order_lines)
+                    total = sum(line["amount"] for line in st.session_state.order_lines)
+                    st.success(f"Order {st.session_state.current_order_id} saved!")
+                    st.info(f"Total Amount: Rs.{total:.2f}")
+                except Exception as e:
+                    st.error(f"Save Error: {str(e)[:100]}...")
     
     with col_pdf:
         if st.button("📄 Generate PDF", type="primary", use_container_width=True):
@@ -596,6 +655,62 @@ if st.session_state.data_loaded:
                 st.dataframe(pd.DataFrame(summary_data), use_container_width=True)
                 st.metric("Grand Total", f"Rs.{total:.2f}")
 
+# ================= SEARCH & REPORTS =================
+# Everything below reads from the snapshot, never from the primary database
+st.markdown("---")
+st.header("🔍 Search Orders")
+
+if not orders_db_ready:
+    st.info("Search is disabled because saved orders are unavailable.")
+else:
+    age = snapshot_age()
+    if age is not None:
+        st.caption(f"Showing saved orders as of {int(age)}s ago (refreshed every {SNAPSHOT_INTERVAL}s)")
+
+    # Queries run only when the form is submitted, not on every rerun
+    with st.form("search_form"):
+        search = st.text_input("Search by Order ID, Vendor, Event or Order By", key="search")
+        submitted = st.form_submit_button("🔍 Search")
+
+    if submitted:
+        try:
+            like = f"%{search.strip()}%"
+            st.session_state.search_results = query_snapshot(
+                """SELECT order_id, timestamp, vendor, campus, event, rate_type, order_by, total
+                   FROM orders
+                   WHERE order_id LIKE ? OR vendor LIKE ? OR event LIKE ? OR order_by LIKE ?
+                   ORDER BY rowid DESC LIMIT 200""",
+                (like, like, like, like)
+            )
+        except Exception as e:
+            st.session_state.search_results = None
+            st.error(f"Search Error: {str(e)[:100]}...")
+
+    results_df = st.session_state.search_results
+    if results_df is not None:
+        if results_df.empty:
+            st.info("No saved orders found.")
+        else:
+            st.dataframe(results_df, use_container_width=True)
+            st.download_button(
+                label="⬇️ Export CSV",
+                data=results_df.to_csv(index=False).encode("utf-8"),
+                file_name="orders.csv",
+                mime="text/csv"
+            )
+
+    # Cached per snapshot, so this runs one query per refresh, not per rerun
+    st.subheader("📈 Totals by Vendor")
+    if age is not None:
+        try:
+            report_df = load_vendor_report(os.path.getmtime(SNAPSHOT_DB_FILE))
+            if report_df.empty:
+                st.info("No saved orders yet.")
+            else:
+                st.dataframe(report_df, use_container_width=True)
+        except Exception as e:
+            st.error(f"Report Error: {str(e)[:100]}...")
+
 # Cleanup
 import atexit
 @atexit.register
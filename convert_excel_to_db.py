@@ -1,87 +1,142 @@
 import pandas as pd
 import sqlite3
 import os
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
-def excel_to_sqlite():
+# शीट का नाम -> (टेबल का नाम, कॉलम के नाम)
+SHEETS = {
+    "Categories": ("categories", ['category_name']),
+    "VendorList": ("vendors", ['vendor_name']),
+    "Campus": ("campus", ['campus_name']),
+    "Shiv": ("shiv_rates", ['category_name', 'rate']),
+    "Metro": ("metro_rates", ['category_name', 'rate']),
+}
+
+def find_workbooks(source):
+    """फाइल, फोल्डर या glob pattern से सभी workbooks की सूची बनाएं"""
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(source, "*.xlsx"))
+    elif os.path.exists(source):
+        # असली फाइल का नाम पहले देखें, जैसे "Orders [Metro].xlsx"
+        paths = [source]
+    elif any(ch in source for ch in "*?["):
+        paths = glob.glob(source)
+    else:
+        paths = []
+    # Excel की lock फाइलें (~$...) छोड़ दें
+    return sorted(p for p in paths if not os.path.basename(p).startswith("~$"))
+
+def read_workbook(excel_path):
+    """एक workbook को सिर्फ एक बार खोलकर सभी शीट्स पढ़ें (worker process में चलता है)"""
+    start = time.perf_counter()
+    frames = {}
+    errors = {}
+    try:
+        # पूरी zip फाइल एक ही बार parse होती है
+        with pd.ExcelFile(excel_path) as xls:
+            for sheet, (table, columns) in SHEETS.items():
+                try:
+                    df = pd.read_excel(xls, sheet_name=sheet)
+                    if df.empty or len(df.columns) < len(columns):
+                        continue
+                    df = df.iloc[:, list(range(len(columns)))]
+                    df.columns = columns
+                    frames[table] = df
+                except Exception as e:
+                    errors[table] = str(e)
+    except Exception as e:
+        errors["workbook"] = str(e)
+    return excel_path, frames, errors, time.perf_counter() - start
+
+def find_rate_conflicts(results):
+    """ऐसी categories ढूँढें जिनकी rate अलग-अलग फाइलों में अलग है"""
+    conflicts = []
+    for table, columns in SHEETS.values():
+        if 'rate' not in columns:
+            continue
+        parts = [
+            frames[table].assign(file=os.path.basename(excel_path))
+            for excel_path, frames, _, _ in results if table in frames
+        ]
+        if len(parts) < 2:
+            continue
+        df = pd.concat(parts, ignore_index=True).dropna(subset=['category_name', 'rate'])
+        for category, group in df.groupby('category_name', sort=True):
+            if group['rate'].nunique() > 1:
+                rates = list(zip(group['file'], group['rate']))
+                conflicts.append((table, category, rates))
+    return conflicts
+
+def merge_frames(results):
+    """सभी workbooks की टेबल्स को जोड़ें और duplicates हटाएं"""
+    merged = {}
+    for table, columns in SHEETS.values():
+        parts = [frames[table] for _, frames, _, _ in results if table in frames]
+        if not parts:
+            continue
+        df = pd.concat(parts, ignore_index=True)
+        if 'rate' in columns:
+            # खाली rate वाली rows छोड़ दें, ताकि conflict warning और डेटाबेस एक जैसे रहें
+            df = df.dropna(subset=columns)
+        # एक ही category की rate कई फाइलों में हो तो बाद वाली फाइल मान्य होगी
+        df = df.drop_duplicates(subset=columns[0], keep="last")
+        merged[table] = df
+    return merged
+
+def excel_to_sqlite(source="Digital_Orders.xlsx", db_path='vendor_orders.db', workers=None):
     print("Excel फाइलों को SQLite डेटाबेस में बदल रहा हूँ...")
-    
-    # डेटाबेस कनेक्शन बनाएं
-    conn = sqlite3.connect('vendor_orders.db')
-    
+
+    workbooks = find_workbooks(source)
+    if not workbooks:
+        print(f"❌ {source} में कोई Excel फाइल नहीं मिली!")
+        return
+
+    print(f"✅ {len(workbooks)} workbook(s) लोड हो रही हैं...")
+
+    # हर workbook अलग process में decode होती है
+    total_start = time.perf_counter()
+    if len(workbooks) == 1:
+        results = [read_workbook(workbooks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(read_workbook, workbooks))
+
+    # हर फाइल का सारांश
+    print("\nफाइलों का सारांश:")
+    for excel_path, frames, errors, elapsed in results:
+        rows = sum(len(df) for df in frames.values())
+        print(f"  • {os.path.basename(excel_path)}: {rows} rows, {elapsed:.2f}s")
+        for table, error in errors.items():
+            print(f"     ✗ {table} में error: {error}")
+
+    # अलग-अलग vendors की rates टकराएँ तो चुपचाप merge न करें
+    conflicts = find_rate_conflicts(results)
+    if conflicts:
+        print(f"\n⚠️ {len(conflicts)} categories की rate फाइलों में अलग-अलग है:")
+        for table, category, rates in conflicts:
+            detail = ", ".join(f"{f}={r}" for f, r in rates)
+            print(f"  • {table} / {category}: {detail} → {rates[-1][0]} वाली rate ली गई")
+
+    merged = merge_frames(results)
+
+    # डेटाबेस कनेक्शन बनाएं (सिर्फ यही process लिखता है)
+    conn = sqlite3.connect(db_path)
+
     try:
-        # आपके मूल Excel फाइल का पथ
-        excel_path = "Digital_Orders.xlsx"
-        
-        if not os.path.exists(excel_path):
-            print(f"❌ {excel_path} फाइल नहीं मिली!")
-            return
-        
-        print(f"✅ {excel_path} लोड हो रही है...")
-        
-        # 1. Categories शीट (पहला कॉलम लें)
-        print("\n1. Categories लोड हो रही हैं...")
-        try:
-            categories_df = pd.read_excel(excel_path, sheet_name="Categories")
-            # पहला कॉलम लें और टेबल बनाएं
-            if not categories_df.empty:
-                categories_df = categories_df.iloc[:, [0]]  # सिर्फ पहला कॉलम
-                categories_df.columns = ['category_name']
-                categories_df.to_sql('categories', conn, if_exists='replace', index=False)
-                print(f"   ✓ Categories टेबल बन गई: {len(categories_df)} rows")
-        except Exception as e:
-            print(f"   ✗ Categories में error: {e}")
-        
-        # 2. VendorList शीट
-        print("\n2. Vendors लोड हो रहे हैं...")
-        try:
-            vendors_df = pd.read_excel(excel_path, sheet_name="VendorList")
-            if not vendors_df.empty:
-                vendors_df = vendors_df.iloc[:, [0]]  # सिर्फ पहला कॉलम
-                vendors_df.columns = ['vendor_name']
-                vendors_df.to_sql('vendors', conn, if_exists='replace', index=False)
-                print(f"   ✓ Vendors टेबल बन गई: {len(vendors_df)} rows")
-        except Exception as e:
-            print(f"   ✗ Vendors में error: {e}")
-        
-        # 3. Campus शीट
-        print("\n3. Campus लोड हो रहा है...")
-        try:
-            campus_df = pd.read_excel(excel_path, sheet_name="Campus")
-            if not campus_df.empty:
-                campus_df = campus_df.iloc[:, [0]]  # सिर्फ पहला कॉलम
-                campus_df.columns = ['campus_name']
-                campus_df.to_sql('campus', conn, if_exists='replace', index=False)
-                print(f"   ✓ Campus टेबल बन गई: {len(campus_df)} rows")
-        except Exception as e:
-            print(f"   ✗ Campus में error: {e}")
-        
-        # 4. Shiv rates शीट (2 कॉलम: Category और Rate)
-        print("\n4. Shiv rates लोड हो रही हैं...")
-        try:
-            shiv_df = pd.read_excel(excel_path, sheet_name="Shiv")
-            if not shiv_df.empty and len(shiv_df.columns) >= 2:
-                shiv_df = shiv_df.iloc[:, [0, 1]]  # पहले दो कॉलम
-                shiv_df.columns = ['category_name', 'rate']
-                shiv_df.to_sql('shiv_rates', conn, if_exists='replace', index=False)
-                print(f"   ✓ Shiv rates टेबल बन गई: {len(shiv_df)} rows")
-        except Exception as e:
-            print(f"   ✗ Shiv rates में error: {e}")
-        
-        # 5. Metro rates शीट (2 कॉलम: Category और Rate)
-        print("\n5. Metro rates लोड हो रही हैं...")
-        try:
-            metro_df = pd.read_excel(excel_path, sheet_name="Metro")
-            if not metro_df.empty and len(metro_df.columns) >= 2:
-                metro_df = metro_df.iloc[:, [0, 1]]  # पहले दो कॉलम
-                metro_df.columns = ['category_name', 'rate']
-                metro_df.to_sql('metro_rates', conn, if_exists='replace', index=False)
-                print(f"   ✓ Metro rates टेबल बन गई: {len(metro_df)} rows")
-        except Exception as e:
-            print(f"   ✗ Metro rates में error: {e}")
-        
+        print()
+        for i, (table, df) in enumerate(merged.items(), 1):
+            try:
+                df.to_sql(table, conn, if_exists='replace', index=False)
+                print(f"{i}. ✓ {table} टेबल बन गई: {len(df)} rows")
+            except Exception as e:
+                print(f"{i}. ✗ {table} में error: {e}")
+
         print("\n" + "="*50)
-        print("✅ सभी टेबल्स सफलतापूर्वक बन गईं!")
-        
+        print(f"✅ सभी टेबल्स सफलतापूर्वक बन गईं! ({time.perf_counter() - total_start:.2f}s)")
+
         # टेबल्स की जाँच करें
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
@@ -92,14 +147,20 @@ def excel_to_sqlite():
             cursor.execute(f"SELECT COUNT(*) FROM {table[0]}")
             count = cursor.fetchone()[0]
             print(f"  • {table[0]}: {count} rows")
-        
+
     except Exception as e:
         print(f"❌ मुख्य error: {e}")
-    
+
     finally:
         # कनेक्शन बंद करें
         conn.close()
         print("\n✅ डेटाबेस बंद किया गया")
 
 if __name__ == "__main__":
-    excel_to_sqlite()
+    parser = argparse.ArgumentParser(description="Excel workbooks को SQLite में बदलें")
+    parser.add_argument("source", nargs="?", default="Digital_Orders.xlsx",
+                        help="Workbook, फोल्डर या glob pattern (default: Digital_Orders.xlsx)")
+    parser.add_argument("--db", default="vendor_orders.db", help="SQLite फाइल का पथ")
+    parser.add_argument("--workers", type=int, default=None, help="Processes की संख्या")
+    args = parser.parse_args()
+    excel_to_sqlite(args.source, args.db, args.workers)
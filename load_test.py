@@ -0,0 +1,481 @@
+"""Concurrent-session load test for app.py
+
+Drives N simulated staff sessions through app.py with Streamlit's headless
+AppTest API. Every session uploads a workbook, builds an order of random
+size and generates a PDF. Each session runs in its own process, since
+AppTest patches process-wide Streamlit state and cannot run concurrently
+in threads. For each concurrency level the harness reports per-rerun
+latency percentiles, reruns per second and resident memory per session.
+
+With --save-test it instead times save_order() while other sessions keep
+running searches and the vendor report against a large orders database.
+As on a real server, a single process refreshes the snapshot.
+
+Usage:
+    python load_test.py --sessions 1,5,10,25,50
+    python load_test.py --workbook Digital_Orders.xlsx --max-lines 15
+    python load_test.py --save-test 0,4,8 --seed-orders 200000
+"""
+import argparse
+import gc
+import io
+import math
+import multiprocessing
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from orders_db import (
+    connect_primary, init_orders_db, save_order, refresh_snapshot, snapshot_refresh_loop
+)
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# ================= WORKBOOK =================
+def build_sample_workbook(num_categories=50):
+    """Build an in-memory workbook with the same sheets as Digital_Orders.xlsx"""
+    categories = [f"Category {i}" for i in range(1, num_categories + 1)]
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame({"Category": categories}).to_excel(writer, sheet_name="Categories", index=False)
+        pd.DataFrame({"Vendor": ["Shivnanda", "Metro"]}).to_excel(writer, sheet_name="VendorList", index=False)
+        pd.DataFrame({"Campus": ["Main Campus", "North Campus"]}).to_excel(writer, sheet_name="Campus", index=False)
+        pd.DataFrame({
+            "Category": categories,
+            "Rate": [100.0 + i for i in range(num_categories)]
+        }).to_excel(writer, sheet_name="Shiv", index=False)
+        pd.DataFrame({
+            "Category": categories,
+            "Rate": [120.0 + i for i in range(num_categories)]
+        }).to_excel(writer, sheet_name="Metro", index=False)
+    return buffer.getvalue()
+
+def install_upload(workbook_bytes):
+    """Make every st.file_uploader call return the workbook.
+
+    AppTest cannot drive the file uploader widget, so the upload is
+    simulated by replacing it in the session's process. Each call gets its
+    own buffer so reruns never share a file position.
+    """
+    def fake_file_uploader(*args, **kwargs):
+        return io.BytesIO(workbook_bytes)
+    st.file_uploader = fake_file_uploader
+
+# ================= MEMORY =================
+def resident_memory_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Fallback for systems without /proc (peak rather than current RSS)
+    import resource
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+# ================= SESSION =================
+def find_widget(widgets, key_prefix):
+    """Return the first widget whose key starts with key_prefix"""
+    for widget in widgets:
+        if widget.key and widget.key.startswith(key_prefix):
+            return widget
+    raise LookupError(f"No widget with key starting '{key_prefix}'")
+
+def find_button(at, label):
+    """Return the button whose label contains the given text"""
+    for button in at.button:
+        if label in button.label:
+            return button
+    raise LookupError(f"No button labelled '{label}'")
+
+class Session:
+    """One simulated user working through app.py"""
+
+    def __init__(self, session_id, num_lines, timeout):
+        self.session_id = session_id
+        self.num_lines = num_lines
+        self.timeout = timeout
+        self.at = None
+        self.latencies = []
+        self.error = None
+
+    def rerun(self):
+        """Rerun the script and record how long it took"""
+        start = time.perf_counter()
+        self.at.run(timeout=self.timeout)
+        self.latencies.append(time.perf_counter() - start)
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].value)
+
+    def run(self):
+        rng = random.Random(self.session_id)
+        try:
+            # First page load (workbook upload happens on every rerun)
+            self.at = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+            self.rerun()
+
+            find_button(self.at, "New Order").click()
+            self.rerun()
+
+            find_widget(self.at.text_input, "event").set_value(f"Load test event {self.session_id}")
+            find_widget(self.at.text_input, "orderby").set_value(f"User {self.session_id}")
+            self.rerun()
+
+            for i in range(self.num_lines):
+                if i > 0:
+                    find_widget(self.at.button, f"add_{i - 1}").click()
+                    self.rerun()
+                categories = find_widget(self.at.selectbox, f"cat_{i}_")
+                categories.set_value(rng.choice(categories.options))
+                find_widget(self.at.number_input, f"h_{i}_").set_value(round(rng.uniform(1, 20), 1))
+                find_widget(self.at.number_input, f"w_{i}_").set_value(round(rng.uniform(1, 20), 1))
+                find_widget(self.at.number_input, f"q_{i}_").set_value(rng.randint(1, 10))
+                self.rerun()
+
+            find_button(self.at, "Generate PDF").click()
+            self.rerun()
+            if not self.at.session_state["pdf_data"]:
+                raise RuntimeError("PDF was not generated")
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        return self
+
+# ================= REPORT =================
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def session_worker(session_id, num_lines, timeout, workbook_bytes, workdir, barrier, results):
+    """Run one session in this process and put its measurements on the queue"""
+    # Orders and snapshots the app writes stay out of the real working directory
+    os.chdir(workdir)
+    install_upload(workbook_bytes)
+
+    # Warm-up run so imports, the Runtime and the compiled app.py are not
+    # counted as memory held by the session
+    try:
+        AppTest.from_file(APP_PATH, default_timeout=timeout).run(timeout=timeout)
+    except Exception:
+        pass
+    gc.collect()
+    rss_before = resident_memory_mb()
+
+    session = Session(session_id, num_lines, timeout)
+    try:
+        # Release all sessions together so they really overlap
+        barrier.wait(timeout=timeout)
+    except threading.BrokenBarrierError:
+        session.error = "BrokenBarrierError: another session failed to start"
+    started = time.time()
+    if session.error is None:
+        session.run()
+    finished = time.time()
+
+    # The AppTest is still referenced here, so its database is still alive
+    rss_after = resident_memory_mb()
+    results.put({
+        "latencies": session.latencies,
+        "error": session.error,
+        "started": started,
+        "finished": finished,
+        "rss_mb": rss_after,
+        "session_mb": max(0.0, rss_after - rss_before),
+    })
+
+def collect_results(results, processes, expected, on_result=None):
+    """Read up to expected results from the queue until every worker has exited"""
+    collected = []
+
+    def add(result):
+        collected.append(result)
+        if on_result:
+            on_result(result)
+
+    while len(collected) < expected:
+        try:
+            add(results.get(timeout=1))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                break
+    # A worker may have put its result just before exiting
+    while len(collected) < expected:
+        try:
+            add(results.get_nowait())
+        except queue.Empty:
+            break
+    return collected
+
+def run_level(num_sessions, max_lines, timeout, workbook_bytes, workdir):
+    """Run num_sessions concurrent sessions, one process each, and return their statistics"""
+    # spawn gives every session a fresh interpreter, so memory is not reused between levels
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(num_sessions)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=session_worker,
+            args=(i, random.randint(1, max_lines), timeout, workbook_bytes, workdir, barrier, results)
+        )
+        for i in range(num_sessions)
+    ]
+    for process in processes:
+        process.start()
+
+    collected = collect_results(results, processes, num_sessions)
+    for process in processes:
+        process.join()
+
+    errors = [r["error"] for r in collected if r["error"]]
+    crashed = num_sessions - len(collected)
+    errors += ["Session process exited without reporting"] * crashed
+
+    latencies = sorted(lat for r in collected for lat in r["latencies"])
+    wall_time = (max(r["finished"] for r in collected) - min(r["started"] for r in collected)
+                 if collected else 0.0)
+    stats = {
+        "sessions": num_sessions,
+        "reruns": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "reruns_per_s": len(latencies) / wall_time if wall_time else 0.0,
+        "rss_mb": sum(r["rss_mb"] for r in collected) / len(collected) if collected else 0.0,
+        "mb_per_session": sum(r["session_mb"] for r in collected) / len(collected) if collected else 0.0,
+        "errors": len(errors),
+    }
+    return stats, errors
+
+# ================= SAVE UNDER REPORT =================
+def seed_orders(num_orders):
+    """Fill the orders database with num_orders saved orders"""
+    rng = random.Random(0)
+    conn = connect_primary()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((f"SEED{i:09d}", "01-01-2026 10:00", rng.choice(["Shivnanda", "Metro"]),
+                  rng.choice(["Main Campus", "North Campus"]), f"Event {i}",
+                  rng.choice(["Shivnanda", "Metro"]), f"User {i % 100}", rng.uniform(100, 50000))
+                 for i in range(num_orders))
+            )
+    finally:
+        conn.close()
+
+def refresher_worker(num_orders, interval, workdir, ready, stop):
+    """Seed the orders database, then be the only process refreshing the snapshot"""
+    os.chdir(workdir)
+    init_orders_db()
+    seed_orders(num_orders)
+    refresh_snapshot()
+    ready.set()
+    snapshot_refresh_loop(interval, stop)
+
+def saver_worker(num_saves, timeout, workdir, barrier, results):
+    """Time num_saves calls to save_order() and report each one's latency"""
+    os.chdir(workdir)
+    latencies = []
+    error = None
+    try:
+        barrier.wait(timeout=timeout)
+        for i in range(num_saves):
+            order_data = {
+                "order_id": f"SAVE{i:06d}",
+                "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M"),
+                "vendor": "Shivnanda",
+                "campus": "Main Campus",
+                "event": f"Load test event {i}",
+                "rate_type": "Shivnanda",
+                "order_by": "Load test"
+            }
+            order_lines = [
+                {"category": category, "height": 10.0, "width": 5.0, "qty": 2,
+                 "area": 100.0, "rate": 150.0, "amount": 15000.0}
+                for category in ["Banner", "Poster", "Standee"]
+            ]
+            start = time.perf_counter()
+            save_order(order_data, order_lines)
+            latencies.append(time.perf_counter() - start)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    results.put({"role": "saver", "latencies": latencies, "error": error})
+
+def reporter_worker(reporter_id, num_orders, timeout, workdir, barrier, stop, results):
+    """Keep running searches and the vendor report until told to stop"""
+    os.chdir(workdir)
+    # The refresher process owns the snapshot, as one server would
+    os.environ["ORDERS_SNAPSHOT_REFRESH"] = "0"
+    rng = random.Random(reporter_id)
+    session = Session(f"reporter-{reporter_id}", 1, timeout)
+    searches = 0
+    try:
+        session.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        session.rerun()
+        barrier.wait(timeout=timeout)
+        while not stop.is_set():
+            # Worst case: the vendor report is recomputed on every rerun
+            st.cache_data.clear()
+            # An order near the start of the table matches, but the newest-first
+            # search still has to scan almost every row to reach it
+            term = f"SEED{rng.randrange(max(1, min(num_orders, 1000))):09d}"
+            find_widget(session.at.text_input, "search").set_value(term)
+            find_button(session.at, "Search").click()
+            session.rerun()
+            found = session.at.session_state["search_results"]
+            if found is None or found.empty:
+                raise RuntimeError(f"Search for {term} returned no orders")
+            searches += 1
+    except Exception as e:
+        session.error = f"{type(e).__name__}: {e}"
+    results.put({"role": "reporter", "searches": searches, "error": session.error})
+
+def run_save_level(num_reporters, num_saves, num_orders, refresh_interval, timeout, workdir):
+    """Measure save latency while num_reporters sessions run searches and reports"""
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Event()
+    stop = ctx.Event()
+    barrier = ctx.Barrier(num_reporters + 1)
+    results = ctx.Queue()
+
+    refresher = ctx.Process(target=refresher_worker,
+                            args=(num_orders, refresh_interval, workdir, ready, stop))
+    refresher.start()
+    processes = []
+    if ready.wait(timeout):
+        processes = [ctx.Process(target=saver_worker,
+                                 args=(num_saves, timeout, workdir, barrier, results))]
+        processes += [
+            ctx.Process(target=reporter_worker,
+                        args=(i, num_orders, timeout, workdir, barrier, stop, results))
+            for i in range(num_reporters)
+        ]
+    for process in processes:
+        process.start()
+
+    def stop_after_saver(result):
+        if result["role"] == "saver":
+            # Reporters run for exactly as long as the saves take
+            stop.set()
+
+    collected = collect_results(results, processes, len(processes), stop_after_saver)
+    stop.set()
+    for process in processes + [refresher]:
+        process.join()
+
+    saver = next((r for r in collected if r["role"] == "saver"), {"latencies": [], "error": None})
+    latencies = sorted(saver["latencies"])
+    errors = [r["error"] for r in collected if r["error"]]
+    errors += ["Process exited without reporting"] * (len(processes) - len(collected))
+    if not processes:
+        errors.append("Refresher could not seed the orders database")
+    return {
+        "reporters": num_reporters,
+        "saves": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "searches": sum(r.get("searches", 0) for r in collected),
+        "errors": len(errors),
+    }, errors
+
+def print_save_report(results):
+    header = (f"{'Reporters':>9} {'Saves':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+              f"{'max ms':>8} {'Searches':>9} {'Errors':>7}")
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['reporters']:>9} {r['saves']:>6} {r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['searches']:>9} {r['errors']:>7}")
+    print("\nTimes are for save_order() alone. They should stay close to the")
+    print("0-reporter row as reporters grow.")
+
+def print_report(results):
+    # Proc MB is the whole session process; MB/sess is what the session itself added
+    print("\nEach session runs in its own process, so latency growth shows CPU")
+    print("oversubscription, not contention inside a single Streamlit server.")
+    header = (f"{'Sessions':>8} {'Reruns':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+              f"{'max ms':>8} {'reruns/s':>9} {'Proc MB':>8} {'MB/sess':>8} {'Errors':>7}")
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['sessions']:>8} {r['reruns']:>7} {r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['reruns_per_s']:>9.2f} "
+              f"{r['rss_mb']:>8.1f} {r['mb_per_session']:>8.2f} {r['errors']:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test app.py with concurrent sessions")
+    parser.add_argument("--sessions", default="1,5,10,25",
+                        help="Comma separated concurrency levels (default: 1,5,10,25)")
+    parser.add_argument("--max-lines", type=int, default=10,
+                        help="Maximum categories per order; each session picks 1..N")
+    parser.add_argument("--workbook", help="Workbook to upload (default: generated sample)")
+    parser.add_argument("--categories", type=int, default=50,
+                        help="Categories in the generated sample workbook")
+    parser.add_argument("--timeout", type=float, default=60,
+                        help="Seconds allowed for a single rerun")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-test",
+                        help="Comma separated reporter counts; measure save latency while they search")
+    parser.add_argument("--saves", type=int, default=50,
+                        help="Saves measured per --save-test level")
+    parser.add_argument("--seed-orders", type=int, default=200000,
+                        help="Saved orders to preload for --save-test")
+    parser.add_argument("--refresh-interval", type=float, default=5,
+                        help="Seconds between snapshot refreshes during --save-test")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    levels = [int(n) for n in args.sessions.split(",") if n.strip()]
+
+    if args.workbook:
+        with open(args.workbook, "rb") as f:
+            workbook_bytes = f.read()
+        print(f"Using workbook {args.workbook}")
+    else:
+        workbook_bytes = build_sample_workbook(args.categories)
+        print(f"Using generated workbook with {args.categories} categories")
+
+    if args.save_test:
+        results = []
+        for num_reporters in [int(n) for n in args.save_test.split(",") if n.strip()]:
+            print(f"Saving with {num_reporters} concurrent reporter(s)...")
+            with tempfile.TemporaryDirectory() as workdir:
+                stats, errors = run_save_level(num_reporters, args.saves, args.seed_orders,
+                                               args.refresh_interval, args.timeout, workdir)
+            results.append(stats)
+            for error in errors[:5]:
+                print(f"   ✗ {error}")
+        print_save_report(results)
+        return
+
+    results = []
+    for num_sessions in levels:
+        print(f"Running {num_sessions} concurrent session(s)...")
+        with tempfile.TemporaryDirectory() as workdir:
+            stats, errors = run_level(num_sessions, args.max_lines, args.timeout,
+                                      workbook_bytes, workdir)
+        results.append(stats)
+        for error in errors[:5]:
+            print(f"   ✗ {error}")
+
+    print_report(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Saved orders and the read-only snapshot used by search and reports
+
+Orders are written to ORDERS_DB_FILE. A copy, SNAPSHOT_DB_FILE, is refreshed
+periodically with SQLite's online backup API; search, reports and exports
+read only from the copy so they never hold up order saves.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+ORDERS_DB_FILE = "orders.db"
+SNAPSHOT_DB_FILE = "orders_snapshot.db"
+SNAPSHOT_INTERVAL = 30  # seconds
+SNAPSHOT_RETRY_INTERVAL = 5  # seconds, after a failed refresh
+
+logger = logging.getLogger(__name__)
+
+def connect_primary():
+    """Open a write connection to the orders database"""
+    conn = sqlite3.connect(ORDERS_DB_FILE, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def init_orders_db():
+    """Create order tables if they do not exist"""
+    conn = connect_primary()
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS orders (
+                order_id TEXT PRIMARY KEY,
+                timestamp TEXT,
+                vendor TEXT,
+                campus TEXT,
+                event TEXT,
+                rate_type TEXT,
+                order_by TEXT,
+                total REAL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS order_lines (
+                order_id TEXT,
+                line_no INTEGER,
+                category TEXT,
+                height REAL,
+                width REAL,
+                qty INTEGER,
+                area REAL,
+                rate REAL,
+                amount REAL,
+                PRIMARY KEY (order_id, line_no)
+            )
+        ''')
+        conn.commit()
+    finally:
+        conn.close()
+
+def save_order(order_data, order_lines):
+    """Save order to the primary database (replaces an earlier save of the same order)"""
+    total = sum(line["amount"] for line in order_lines)
+    conn = connect_primary()
+    try:
+        with conn:
+            conn.execute("DELETE FROM order_lines WHERE order_id = ?", (order_data["order_id"],))
+            conn.execute(
+                "INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (order_data["order_id"], order_data["timestamp"], order_data["vendor"],
+                 order_data["campus"], order_data["event"], order_data["rate_type"],
+                 order_data["order_by"], total)
+            )
+            conn.executemany(
+                "INSERT INTO order_lines VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(order_data["order_id"], idx, line["category"], line["height"], line["width"],
+                  line["qty"], line["area"], line["rate"], line["amount"])
+                 for idx, line in enumerate(order_lines, 1) if line["amount"] > 0]
+            )
+    finally:
+        conn.close()
+
+def refresh_snapshot():
+    """Copy the primary database to the read-only snapshot"""
+    # Per-process temp file so two server processes never write the same copy
+    tmp_file = f"{SNAPSHOT_DB_FILE}.{os.getpid()}.tmp"
+    src = connect_primary()
+    dst = sqlite3.connect(tmp_file)
+    try:
+        # Online backup in a single step: in WAL mode this only holds a read
+        # transaction, so concurrent saves are not blocked
+        src.backup(dst)
+        # The copy inherits WAL mode; switch it back so readers never create
+        # -wal/-shm files next to a file that gets swapped
+        dst.execute("PRAGMA journal_mode=DELETE")
+    except Exception:
+        # Don't leave a half-written copy behind for every failed refresh
+        dst.close()
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    finally:
+        dst.close()
+        src.close()
+    
+    # On POSIX the swap is atomic and readers with the old file open keep a
+    # consistent copy. On Windows it fails while any reader has the file open,
+    # so retry briefly before giving up.
+    for attempt in range(5):
+        try:
+            os.replace(tmp_file, SNAPSHOT_DB_FILE)
+            return
+        except PermissionError:
+            if attempt == 4:
+                os.remove(tmp_file)
+                raise
+            time.sleep(0.2)
+
+def snapshot_refresh_loop(interval=SNAPSHOT_INTERVAL, stop=None):
+    """Refresh the snapshot every interval seconds until stop is set"""
+    stop = stop or threading.Event()
+    delay = interval
+    while not stop.wait(delay):
+        try:
+            refresh_snapshot()
+            delay = interval
+        except Exception:
+            logger.exception("Snapshot refresh failed, retrying in %ss", SNAPSHOT_RETRY_INTERVAL)
+            delay = SNAPSHOT_RETRY_INTERVAL
+
+def query_snapshot(sql, params=()):
+    """Run a read-only query against the snapshot"""
+    # immutable: the file is never modified in place, only swapped
+    conn = sqlite3.connect(f"file:{SNAPSHOT_DB_FILE}?mode=ro&immutable=1", uri=True)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+def snapshot_age():
+    """Seconds since the snapshot was last refreshed"""
+    try:
+        return time.time() - os.path.getmtime(SNAPSHOT_DB_FILE)
+    except OSError:
+        return None